@@ -0,0 +1,65 @@
+"""
+Utilidades de caché compartidas para la API de RamboPet
+"""
+
+import hashlib
+import logging
+import time
+
+from django.core.cache import cache
+
+
+logger = logging.getLogger(__name__)
+
+
+def _version_key(namespace):
+    return f'{namespace}:version'
+
+
+def get_cache_version(namespace):
+    """Retorna la versión vigente de un espacio de claves (la crea si no existe)"""
+    return cache.get_or_set(_version_key(namespace), time.time_ns, None)
+
+
+def bump_cache_version(namespace):
+    """
+    Invalida todas las entradas de un espacio de claves cambiando su versión
+    No requiere borrar por patrón (delete_pattern), que solo ofrecen algunos backends;
+    las entradas anteriores quedan huérfanas y expiran por su timeout
+    Se llama desde señales post_save/post_delete: si la caché no responde se
+    registra el error, pero nunca se hace fallar la escritura en la base de datos
+    """
+    try:
+        cache.set(_version_key(namespace), time.time_ns(), None)
+    except Exception:
+        logger.exception('No se pudo invalidar la caché %s', namespace)
+
+
+def versioned_key(namespace, *parts):
+    """Construye una clave con la versión vigente del espacio de claves"""
+    digest = hashlib.md5(
+        '|'.join(str(part) for part in parts).encode(),
+        usedforsecurity=False
+    ).hexdigest()
+    return f'{namespace}:{get_cache_version(namespace)}:{digest}'
+
+
+def cached_data(namespace, key, build, timeout):
+    """
+    Retorna datos cacheados bajo la versión vigente del espacio de claves
+    Si no existen, los construye con build() y los guarda por `timeout` segundos
+    Si la caché no responde, los construye sin cachear
+    """
+    try:
+        clave = versioned_key(namespace, key)
+        data = cache.get(clave)
+    except Exception:
+        logger.exception('Caché %s no disponible', namespace)
+        return build()
+    if data is None:
+        data = build()
+        try:
+            cache.set(clave, data, timeout)
+        except Exception:
+            logger.exception('No se pudo guardar en la caché %s', namespace)
+    return data
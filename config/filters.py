@@ -0,0 +1,34 @@
+"""
+Filter backends compartidos para la API de RamboPet
+"""
+
+from rest_framework.filters import SearchFilter
+
+
+class CachedSearchFilter(SearchFilter):
+    """
+    SearchFilter que resuelve search_fields una sola vez por proceso
+    construct_search() y must_call_distinct() dependen solo de los campos y del
+    modelo (este último recorre _meta en cada petición); ambos se memorizan
+    """
+
+    _lookups = {}
+    _distinct = {}
+
+    def construct_search(self, field_name):
+        key = (type(self), field_name)
+        lookup = self._lookups.get(key)
+        if lookup is None:
+            lookup = self._lookups[key] = super().construct_search(field_name)
+        return lookup
+
+    def must_call_distinct(self, queryset, search_fields):
+        # Con anotaciones el resultado depende del queryset: sin caché
+        if queryset.query.annotations:
+            return super().must_call_distinct(queryset, search_fields)
+
+        key = (type(self), queryset.model, tuple(search_fields))
+        distinct = self._distinct.get(key)
+        if distinct is None:
+            distinct = self._distinct[key] = super().must_call_distinct(queryset, search_fields)
+        return distinct
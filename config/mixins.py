@@ -0,0 +1,76 @@
+"""
+Mixins compartidos para los ViewSets de la API de RamboPet
+"""
+
+import logging
+
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .cache import versioned_key
+
+
+logger = logging.getLogger(__name__)
+
+
+class OptionalFiltersMixin:
+    """
+    Omite los filter backends cuando la petición no trae ningún parámetro de filtrado
+    DjangoFilterBackend construye el filterset y su formulario aunque no haya nada que
+    filtrar; sin parámetros basta con aplicar el orden por defecto del ViewSet
+    """
+
+    def has_filter_params(self):
+        """Indica si la petición trae filtros, búsqueda u ordenamiento"""
+        params = self.request.query_params
+        if not params:
+            return False
+
+        nombres = set(getattr(self, 'filterset_fields', None) or ())
+        nombres.add(api_settings.SEARCH_PARAM)
+        nombres.add(api_settings.ORDERING_PARAM)
+        return not nombres.isdisjoint(params)
+
+    def filter_queryset(self, queryset):
+        if self.has_filter_params():
+            return super().filter_queryset(queryset)
+
+        ordering = getattr(self, 'ordering', None)
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        if ordering:
+            return queryset.order_by(*ordering)
+        return queryset
+
+
+class CachedListMixin:
+    """
+    Cachea los datos del listado por URL completa (filtros, búsqueda, orden y página)
+    Pensado para catálogos que no dependen del usuario; la invalidación se hace con
+    bump_cache_version(cache_namespace) al modificar los datos
+    Se aplica dentro de list(), después de autenticación y permisos
+    Si la caché no responde, el listado se sirve sin cachear
+    """
+
+    cache_namespace = None
+    cache_timeout = 60 * 5
+
+    def list(self, request, *args, **kwargs):
+        try:
+            key = versioned_key(self.cache_namespace, request.get_full_path())
+            data = cache.get(key)
+        except Exception:
+            logger.exception('Caché %s no disponible', self.cache_namespace)
+            return super().list(request, *args, **kwargs)
+        if data is not None:
+            return Response(data)
+
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            try:
+                cache.set(key, response.data, self.cache_timeout)
+            except Exception:
+                logger.exception('No se pudo guardar en la caché %s', self.cache_namespace)
+        return response
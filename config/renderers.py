@@ -0,0 +1,53 @@
+"""
+Renderers compartidos para la API de RamboPet
+"""
+
+import orjson
+from rest_framework.renderers import JSONRenderer
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Renderer JSON basado en orjson (codificación implementada en C)
+    Los tipos que orjson no soporta de forma nativa (Decimal, textos lazy, etc.)
+    se delegan al encoder de DRF para mantener la misma salida que JSONRenderer
+    """
+
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Serializa `data` a JSON y retorna bytes"""
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        options = self.options
+        if self.get_indent(accepted_media_type, renderer_context):
+            options |= orjson.OPT_INDENT_2
+
+        ret = orjson.dumps(data, default=self.encoder_class().default, option=options)
+
+        # Igual que JSONRenderer: escapar U+2028/U+2029 para producir un subconjunto válido de JavaScript
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+def iter_json_array(rows, batch_size=500):
+    """
+    Codifica un iterable de dicts como un arreglo JSON, entregando bloques de bytes
+    Pensado para StreamingHttpResponse: la memoria depende del bloque, no del total
+    """
+    default = ORJSONRenderer.encoder_class().default
+    separador = b''
+    bloque = []
+
+    yield b'['
+    for row in rows:
+        bloque.append(orjson.dumps(row, default=default, option=ORJSONRenderer.options))
+        if len(bloque) >= batch_size:
+            yield separador + b','.join(bloque)
+            separador = b','
+            bloque = []
+
+    if bloque:
+        yield separador + b','.join(bloque)
+    yield b']'
@@ -0,0 +1,25 @@
+"""
+Utilidades compartidas para los serializers de la API de RamboPet
+"""
+
+import copy
+
+
+class CachedFieldsMixin:
+    """
+    Construye los campos declarados en Meta una sola vez por clase
+    ModelSerializer.get_fields() inspecciona el modelo en cada instancia; aquí se
+    guarda el resultado y cada instancia recibe copias superficiales sin enlazar,
+    de modo que bind() y los cambios por instancia no alteran la caché
+    Solo para serializers cuyos campos no dependen del contexto ni de la instancia
+    """
+
+    def get_fields(self):
+        cls = type(self)
+        # Se busca en la propia clase para que una subclase no reutilice la caché del padre
+        fields = cls.__dict__.get('_fields_cache')
+        if fields is None:
+            fields = super().get_fields()
+            cls._fields_cache = fields
+
+        return {name: copy.copy(field) for name, field in fields.items()}
@@ -5,7 +5,7 @@ Configuración del Admin para la aplicación Inventario
 from django.contrib import admin
 from django.utils.html import format_html
 from django.db.models import Sum
-from .models import Producto, Lote, MovimientoInventario
+from .models import Producto, Lote, MovimientoInventario, CATEGORIA_LABELS, LOTES_ACTIVOS
 
 
 class LoteInline(admin.TabularInline):
@@ -107,7 +107,7 @@ class ProductoAdmin(admin.ModelAdmin):
             '<span style="background-color: {}; color: white; padding: 3px 8px; '
             'border-radius: 3px; font-size: 11px; font-weight: bold;">{}</span>',
             color,
-            obj.get_categoria_display()
+            CATEGORIA_LABELS.get(obj.categoria, obj.categoria)
         )
     categoria_badge.short_description = 'Categoría'
 
@@ -144,7 +144,7 @@ class ProductoAdmin(admin.ModelAdmin):
 
     def lotes_count(self, obj):
         """Muestra la cantidad de lotes activos"""
-        count = obj.lotes.filter(activo=True).count()
+        count = len(obj.lotes_activos)
         return format_html(
             '<span style="background-color: #6c757d; color: white; padding: 2px 8px; '
             'border-radius: 10px; font-size: 12px;">{}</span>',
@@ -153,8 +153,8 @@ class ProductoAdmin(admin.ModelAdmin):
     lotes_count.short_description = 'Lotes'
 
     def get_queryset(self, request):
-        """Optimiza las consultas"""
-        return super().get_queryset(request).prefetch_related('lotes')
+        """Precarga solo los lotes activos: alimenta stock_total y lotes_count sin consultas por fila"""
+        return super().get_queryset(request).prefetch_related(LOTES_ACTIVOS)
 
 
 @admin.register(Lote)
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.1 on 2026-10-15 22:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lote',
+            index=models.Index(fields=['producto', 'activo'], name='inventario__product_9daea0_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.1 on 2026-10-15 22:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0004_lote_inventario__product_9daea0_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lote',
+            index=models.Index(condition=models.Q(('activo', True), ('stock_actual__gt', 0)), fields=['fecha_vencimiento'], name='lote_venc_partial_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.1 on 2026-10-15 22:35
+
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hce', '0002_initial'),
+        ('inventario', '0005_lote_lote_venc_partial_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movimientoinventario',
+            index=django.contrib.postgres.indexes.BrinIndex(fields=['fecha_movimiento'], name='mov_fecha_brin_idx'),
+        ),
+    ]
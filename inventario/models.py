@@ -6,8 +6,19 @@ Maneja productos, lotes, movimientos de inventario y alertas de stock
 from django.db import models
 from django.conf import settings
 from django.core.validators import MinValueValidator
+from django.contrib.postgres.indexes import BrinIndex
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from datetime import timedelta
+from functools import cached_property
+
+
+# Stock total de los lotes activos de un producto, calculado en la base de datos
+# Uso: Producto.objects.annotate(stock_total=STOCK_TOTAL)
+STOCK_TOTAL = Coalesce(
+    models.Sum('lotes__stock_actual', filter=models.Q(lotes__activo=True)),
+    0
+)
 
 
 class Producto(models.Model):
@@ -162,9 +173,18 @@ class Producto(models.Model):
     def __str__(self):
         return f"{self.codigo} - {self.nombre}"
 
-    @property
+    @cached_property
     def stock_total(self):
-        """Calcula el stock total sumando todos los lotes activos"""
+        """
+        Calcula el stock total sumando todos los lotes activos
+        El valor se guarda en la instancia: si el stock cambia, volver a obtener el objeto.
+        Una anotación stock_total en el queryset reemplaza directamente esta consulta
+        y con el prefetch LOTES_ACTIVOS se suma en memoria
+        """
+        lotes_activos = self.__dict__.get('lotes_activos')
+        if lotes_activos is not None:
+            return sum(lote.stock_actual for lote in lotes_activos)
+
         return self.lotes.filter(activo=True).aggregate(
             total=models.Sum('stock_actual')
         )['total'] or 0
@@ -186,6 +206,10 @@ class Producto(models.Model):
         )
 
 
+# Etiquetas de categoría para salidas construidas sin instancias (values(), admin)
+CATEGORIA_LABELS = dict(Producto.Categoria.choices)
+
+
 class Lote(models.Model):
     """
     Modelo para los lotes de productos
@@ -262,27 +286,65 @@ class Lote(models.Model):
         indexes = [
             models.Index(fields=['producto', 'fecha_vencimiento']),
             models.Index(fields=['fecha_vencimiento', 'activo']),
+            models.Index(fields=['producto', 'activo']),
+            # Índice parcial para vencidos/próximos a vencer (solo lotes con stock);
+            # soporta la consulta de check_expiring_products
+            models.Index(
+                fields=['fecha_vencimiento'],
+                name='lote_venc_partial_idx',
+                condition=models.Q(activo=True, stock_actual__gt=0)
+            ),
         ]
 
     def __str__(self):
         return f"Lote {self.numero_lote} - {self.producto.nombre}"
 
+    # Los siguientes valores pueden venir precalculados como anotaciones
+    # del queryset (ver LoteViewSet.get_queryset); si no, se calculan en Python
+
     @property
     def esta_vencido(self):
         """Verifica si el lote está vencido"""
+        if '_esta_vencido' in self.__dict__:
+            return self._esta_vencido
         return self.fecha_vencimiento < timezone.now().date()
 
+    @esta_vencido.setter
+    def esta_vencido(self, value):
+        self._esta_vencido = value
+
     @property
     def dias_para_vencer(self):
         """Calcula los días que faltan para el vencimiento"""
+        if '_dias_para_vencer' in self.__dict__:
+            return self._dias_para_vencer
         delta = self.fecha_vencimiento - timezone.now().date()
         return delta.days
 
+    @dias_para_vencer.setter
+    def dias_para_vencer(self, value):
+        self._dias_para_vencer = value
+
     @property
     def proximo_a_vencer(self):
         """Verifica si el lote vence en los próximos 30 días"""
+        if '_proximo_a_vencer' in self.__dict__:
+            return self._proximo_a_vencer
         return 0 <= self.dias_para_vencer <= 30
 
+    @proximo_a_vencer.setter
+    def proximo_a_vencer(self, value):
+        self._proximo_a_vencer = value
+
+
+# Lotes activos de cada producto en una sola consulta IN()
+# Uso: Producto.objects.prefetch_related(LOTES_ACTIVOS) -> producto.lotes_activos
+LOTES_ACTIVOS = models.Prefetch(
+    'lotes',
+    queryset=Lote.objects.filter(activo=True),
+    to_attr='lotes_activos'
+)
+
 
 class MovimientoInventario(models.Model):
     """
@@ -369,6 +431,9 @@ class MovimientoInventario(models.Model):
         indexes = [
             models.Index(fields=['lote', '-fecha_movimiento']),
             models.Index(fields=['tipo_movimiento', '-fecha_movimiento']),
+            # La tabla solo crece (no se eliminan movimientos): BRIN es mínimo
+            # y cubre los rangos de fechas de reportes e historiales
+            BrinIndex(fields=['fecha_movimiento'], name='mov_fecha_brin_idx'),
         ]
 
     def __str__(self):
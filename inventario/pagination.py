@@ -0,0 +1,16 @@
+"""
+Clases de paginación para la aplicación Inventario
+"""
+
+from rest_framework.pagination import CursorPagination
+
+
+class MovimientoCursorPagination(CursorPagination):
+    """
+    Paginación por cursor para historiales de movimientos
+    Avanza con un WHERE sobre fecha_movimiento (indexado) en lugar de OFFSET
+    """
+    ordering = '-fecha_movimiento'
+    page_size = 50
+    page_size_query_param = 'limit'
+    max_page_size = 200
@@ -3,7 +3,7 @@ Serializers para la aplicación Inventario
 """
 
 from rest_framework import serializers
-from .models import Producto, Lote, MovimientoInventario
+from .models import Producto, Lote, MovimientoInventario, CATEGORIA_LABELS
 
 
 class ProductoSerializer(serializers.ModelSerializer):
@@ -14,6 +14,7 @@ class ProductoSerializer(serializers.ModelSerializer):
     unidad_medida_display = serializers.CharField(source='get_unidad_medida_display', read_only=True)
     stock_total = serializers.IntegerField(read_only=True)
     tiene_stock_bajo = serializers.BooleanField(read_only=True)
+    cantidad_lotes = serializers.SerializerMethodField()
 
     class Meta:
         model = Producto
@@ -33,6 +34,7 @@ class ProductoSerializer(serializers.ModelSerializer):
             'stock_maximo',
             'stock_total',
             'tiene_stock_bajo',
+            'cantidad_lotes',
             'precio_compra',
             'precio_venta',
             'requiere_receta',
@@ -43,6 +45,13 @@ class ProductoSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'fecha_creacion', 'fecha_actualizacion']
 
+    def get_cantidad_lotes(self, obj):
+        """Cuenta los lotes activos usando el prefetch LOTES_ACTIVOS si está disponible"""
+        lotes_activos = getattr(obj, 'lotes_activos', None)
+        if lotes_activos is not None:
+            return len(lotes_activos)
+        return obj.lotes.filter(activo=True).count()
+
     def validate_codigo(self, value):
         """Valida que el código sea único"""
         # Si estamos actualizando, excluir el producto actual
@@ -138,6 +147,16 @@ class MovimientoInventarioSerializer(serializers.ModelSerializer):
             'fecha_movimiento'
         ]
 
+    def __init__(self, *args, tipo_movimiento=None, **kwargs):
+        """
+        tipo_movimiento permite que la vista fije el tipo sin copiar request.data
+        En ese caso el campo no se lee del body y se pasa en serializer.save()
+        """
+        super().__init__(*args, **kwargs)
+        self.tipo_movimiento = tipo_movimiento
+        if tipo_movimiento is not None:
+            self.fields['tipo_movimiento'].read_only = True
+
     def validate_cantidad(self, value):
         """Valida que la cantidad sea positiva"""
         if value <= 0:
@@ -147,7 +166,7 @@ class MovimientoInventarioSerializer(serializers.ModelSerializer):
     def validate(self, attrs):
         """Validaciones personalizadas"""
         lote = attrs.get('lote')
-        tipo_movimiento = attrs.get('tipo_movimiento')
+        tipo_movimiento = attrs.get('tipo_movimiento', self.tipo_movimiento)
         cantidad = attrs.get('cantidad')
 
         # Para salidas, verificar que haya stock suficiente
@@ -186,6 +205,31 @@ class ProductoListSerializer(serializers.ModelSerializer):
         ]
 
 
+def producto_list_rows(queryset):
+    """
+    Versión de solo lectura de ProductoListSerializer basada en values()
+    Evita instanciar modelos y campos de DRF por fila
+    El queryset debe venir anotado con stock_total
+    """
+    return [
+        {
+            'id': producto['id'],
+            'codigo': producto['codigo'],
+            'nombre': producto['nombre'],
+            'categoria': producto['categoria'],
+            'categoria_display': CATEGORIA_LABELS.get(producto['categoria'], producto['categoria']),
+            'stock_total': producto['stock_total'],
+            'precio_venta': (
+                str(producto['precio_venta']) if producto['precio_venta'] is not None else None
+            ),
+            'activo': producto['activo']
+        }
+        for producto in queryset.values(
+            'id', 'codigo', 'nombre', 'categoria', 'stock_total', 'precio_venta', 'activo'
+        )
+    ]
+
+
 class LoteListSerializer(serializers.ModelSerializer):
     """
     Serializer simplificado para listados de lotes
@@ -204,6 +248,26 @@ class LoteListSerializer(serializers.ModelSerializer):
         ]
 
 
+def lote_list_rows(queryset):
+    """
+    Versión de solo lectura de LoteListSerializer basada en values()
+    Evita instanciar modelos y campos de DRF por fila
+    """
+    return [
+        {
+            'id': lote['id'],
+            'numero_lote': lote['numero_lote'],
+            'producto_nombre': lote['producto__nombre'],
+            'fecha_vencimiento': lote['fecha_vencimiento'],
+            'stock_actual': lote['stock_actual'],
+            'activo': lote['activo']
+        }
+        for lote in queryset.values(
+            'id', 'numero_lote', 'producto__nombre', 'fecha_vencimiento', 'stock_actual', 'activo'
+        )
+    ]
+
+
 class StockReportSerializer(serializers.Serializer):
     """
     Serializer para reportes de stock
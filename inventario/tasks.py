@@ -2,12 +2,71 @@
 Tareas de Celery para la aplicación Inventario
 """
 
+import io
 from celery import shared_task
 from django.utils import timezone
 from datetime import timedelta
 from django.core.mail import send_mail
 from django.conf import settings
-from .models import Producto, Lote
+from django.db.models import F
+from usuarios.models import User
+from .models import Producto, Lote, STOCK_TOTAL, CATEGORIA_LABELS
+
+
+# Columnas usadas por el correo de vencimientos (ver _linea_lote_proximo/_linea_lote_vencido)
+_CAMPOS_ALERTA_VENCIMIENTO = (
+    'numero_lote',
+    'fecha_vencimiento',
+    'stock_actual',
+    'producto__codigo',
+    'producto__nombre',
+)
+
+
+def _linea_lote_proximo(lote):
+    """Formatea un lote próximo a vencer para el correo de alertas"""
+    return (
+        f"- {lote.producto.codigo} - {lote.producto.nombre} "
+        f"(Lote: {lote.numero_lote}): Vence el {lote.fecha_vencimiento.strftime('%d/%m/%Y')} "
+        f"({lote.dias_para_vencer} días) - Stock: {lote.stock_actual}"
+    )
+
+
+def _linea_lote_vencido(lote):
+    """Formatea un lote vencido para el correo de alertas"""
+    return (
+        f"- {lote.producto.codigo} - {lote.producto.nombre} "
+        f"(Lote: {lote.numero_lote}): Venció el {lote.fecha_vencimiento.strftime('%d/%m/%Y')} "
+        f"- Stock: {lote.stock_actual} ⚠️"
+    )
+
+
+def _recipients(*roles):
+    """Retorna los emails de los usuarios activos con alguno de los roles indicados"""
+    return list(
+        User.objects.filter(
+            rol__in=roles,
+            activo=True
+        ).values_list('email', flat=True)
+    )
+
+
+def _render_lotes(lotes, formatear_linea, chunk_size=500):
+    """
+    Construye el listado de lotes escribiendo en un buffer
+    Usa iterator() para que Django no mantenga el queryset completo en memoria
+    Retorna una tupla (texto, cantidad de lotes)
+    """
+    buffer = io.StringIO()
+    cantidad = 0
+
+    for lote in lotes.iterator(chunk_size=chunk_size):
+        if cantidad:
+            buffer.write('\n')
+        buffer.write(formatear_linea(lote))
+        cantidad += 1
+
+    return buffer.getvalue(), cantidad
 
 
 @shared_task
@@ -16,18 +75,21 @@ def check_stock_levels():
     Tarea programada para verificar niveles de stock
     Envía alertas cuando los productos están por debajo del stock mínimo
     """
-    productos_bajo_stock = []
+    # El stock y la comparación con el mínimo se calculan en una sola consulta
+    productos = Producto.objects.filter(activo=True).annotate(
+        stock_total=STOCK_TOTAL
+    ).filter(stock_total__lt=F('stock_minimo')).order_by('nombre')
 
-    for producto in Producto.objects.filter(activo=True):
-        stock_total = producto.stock_total
-        if stock_total < producto.stock_minimo:
-            productos_bajo_stock.append({
-                'codigo': producto.codigo,
-                'nombre': producto.nombre,
-                'stock_actual': stock_total,
-                'stock_minimo': producto.stock_minimo,
-                'categoria': producto.get_categoria_display()
-            })
+    productos_bajo_stock = [
+        {
+            'codigo': producto.codigo,
+            'nombre': producto.nombre,
+            'stock_actual': producto.stock_total,
+            'stock_minimo': producto.stock_minimo,
+            'categoria': CATEGORIA_LABELS.get(producto.categoria, producto.categoria)
+        }
+        for producto in productos
+    ]
 
     if productos_bajo_stock:
         # Preparar mensaje de email
@@ -51,13 +113,7 @@ def check_stock_levels():
         """
 
         # Obtener emails de administradores
-        from usuarios.models import User
-        admin_emails = list(
-            User.objects.filter(
-                rol__in=[User.Rol.ADMIN, User.Rol.RECEPCION],
-                activo=True
-            ).values_list('email', flat=True)
-        )
+        admin_emails = _recipients(User.Rol.ADMIN, User.Rol.RECEPCION)
 
         if admin_emails:
             try:
@@ -89,49 +145,40 @@ def check_expiring_products():
         fecha_vencimiento__lte=fecha_limite,
         stock_actual__gt=0,
         activo=True
-    ).select_related('producto').order_by('fecha_vencimiento')
+    ).select_related('producto').only(
+        *_CAMPOS_ALERTA_VENCIMIENTO
+    ).order_by('fecha_vencimiento')
 
     # Lotes vencidos con stock
     lotes_vencidos = Lote.objects.filter(
         fecha_vencimiento__lt=today,
         stock_actual__gt=0,
         activo=True
-    ).select_related('producto')
-
-    if lotes_proximos_vencer.exists() or lotes_vencidos.exists():
-        # Preparar mensajes
-        proximos_list = '\n'.join([
-            f"- {lote.producto.codigo} - {lote.producto.nombre} "
-            f"(Lote: {lote.numero_lote}): Vence el {lote.fecha_vencimiento.strftime('%d/%m/%Y')} "
-            f"({lote.dias_para_vencer} días) - Stock: {lote.stock_actual}"
-            for lote in lotes_proximos_vencer
-        ])
+    ).select_related('producto').only(*_CAMPOS_ALERTA_VENCIMIENTO)
 
-        vencidos_list = '\n'.join([
-            f"- {lote.producto.codigo} - {lote.producto.nombre} "
-            f"(Lote: {lote.numero_lote}): Venció el {lote.fecha_vencimiento.strftime('%d/%m/%Y')} "
-            f"- Stock: {lote.stock_actual} ⚠️"
-            for lote in lotes_vencidos
-        ])
+    # Preparar mensajes iterando en bloques para no cargar todos los lotes en memoria
+    proximos_list, total_proximos = _render_lotes(lotes_proximos_vencer, _linea_lote_proximo)
+    vencidos_list, total_vencidos = _render_lotes(lotes_vencidos, _linea_lote_vencido)
 
+    if total_proximos or total_vencidos:
         subject = f'⚠️ Alerta de Vencimientos - RamboPet'
         message = f"""
         Alerta de Vencimientos en RamboPet
         """
 
-        if lotes_vencidos.exists():
+        if total_vencidos:
             message += f"""
 
-        ⛔ LOTES VENCIDOS CON STOCK ({lotes_vencidos.count()}):
+        ⛔ LOTES VENCIDOS CON STOCK ({total_vencidos}):
         {vencidos_list}
 
         ACCIÓN REQUERIDA: Estos productos deben ser retirados del inventario inmediatamente.
         """
 
-        if lotes_proximos_vencer.exists():
+        if total_proximos:
             message += f"""
 
-        ⚠️ LOTES PRÓXIMOS A VENCER ({lotes_proximos_vencer.count()}):
+        ⚠️ LOTES PRÓXIMOS A VENCER ({total_proximos}):
         {proximos_list}
 
         ACCIÓN SUGERIDA: Priorice el uso de estos productos o considere devolución/descuento.
@@ -143,13 +190,7 @@ def check_expiring_products():
         """
 
         # Obtener emails de administradores y médicos
-        from usuarios.models import User
-        staff_emails = list(
-            User.objects.filter(
-                rol__in=[User.Rol.ADMIN, User.Rol.MEDICO, User.Rol.RECEPCION],
-                activo=True
-            ).values_list('email', flat=True)
-        )
+        staff_emails = _recipients(User.Rol.ADMIN, User.Rol.MEDICO, User.Rol.RECEPCION)
 
         if staff_emails:
             try:
@@ -163,7 +204,7 @@ def check_expiring_products():
             except Exception as e:
                 print(f"Error enviando alertas de vencimiento: {str(e)}")
 
-    return f"Lotes próximos a vencer: {lotes_proximos_vencer.count()}, Vencidos: {lotes_vencidos.count()}"
+    return f"Lotes próximos a vencer: {total_proximos}, Vencidos: {total_vencidos}"
 
 
 @shared_task
@@ -171,7 +212,9 @@ def generate_monthly_inventory_report():
     """
     Genera un reporte mensual del inventario
     """
-    productos = Producto.objects.filter(activo=True)
+    productos = Producto.objects.filter(activo=True).annotate(
+        stock_total=STOCK_TOTAL
+    ).order_by('nombre')
 
     reporte_data = []
     total_valor_inventario = 0
@@ -187,7 +230,7 @@ def generate_monthly_inventory_report():
         reporte_data.append({
             'codigo': producto.codigo,
             'nombre': producto.nombre,
-            'categoria': producto.get_categoria_display(),
+            'categoria': CATEGORIA_LABELS.get(producto.categoria, producto.categoria),
             'stock': stock_total,
             'stock_minimo': producto.stock_minimo,
             'precio_compra': float(producto.precio_compra) if producto.precio_compra else 0,
@@ -209,13 +252,7 @@ def generate_monthly_inventory_report():
     """
 
     # Enviar a administradores
-    from usuarios.models import User
-    admin_emails = list(
-        User.objects.filter(
-            rol=User.Rol.ADMIN,
-            activo=True
-        ).values_list('email', flat=True)
-    )
+    admin_emails = _recipients(User.Rol.ADMIN)
 
     if admin_emails:
         try:
@@ -8,17 +8,57 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
-from django.db.models import Sum, Count, Q
+from django.db.models import (
+    Count, Q, F, Value, Case, When,
+    ExpressionWrapper, BooleanField, CharField, DurationField
+)
+from django.db.models.functions import ExtractDay
 from datetime import timedelta
 from django.utils import timezone
-from .models import Producto, Lote, MovimientoInventario
+from django.http import StreamingHttpResponse
+from config.renderers import iter_json_array
+from .models import (
+    Producto, Lote, MovimientoInventario,
+    STOCK_TOTAL, CATEGORIA_LABELS, LOTES_ACTIVOS
+)
+from .pagination import MovimientoCursorPagination
 from .serializers import (
     ProductoSerializer,
     ProductoListSerializer,
     LoteSerializer,
     LoteListSerializer,
     MovimientoInventarioSerializer,
-    StockReportSerializer
+    producto_list_rows,
+    lote_list_rows
+)
+
+
+# Columnas leídas en los listados (deben cubrir todo lo que usan los serializers)
+PRODUCTO_LIST_FIELDS = ('id', 'codigo', 'nombre', 'categoria', 'precio_venta', 'activo')
+
+LOTE_LIST_FIELDS = (
+    'id',
+    'numero_lote',
+    'fecha_vencimiento',
+    'stock_actual',
+    'activo',
+    'producto__nombre'
+)
+
+MOVIMIENTO_LIST_FIELDS = (
+    'id',
+    'lote__numero_lote',
+    'lote__producto__nombre',
+    'tipo_movimiento',
+    'cantidad',
+    'stock_anterior',
+    'stock_nuevo',
+    'episodio_clinico',
+    'motivo',
+    'documento_referencia',
+    'fecha_movimiento',
+    'realizado_por__first_name',
+    'realizado_por__last_name'
 )
 
 
@@ -63,19 +103,30 @@ class ProductoViewSet(viewsets.ModelViewSet):
             return ProductoListSerializer
         return ProductoSerializer
 
+    def get_queryset(self):
+        """
+        En list/retrieve precarga los lotes activos en una sola consulta para
+        stock_total y cantidad_lotes; el resto de acciones no los necesita
+        En el listado solo se leen las columnas que usa ProductoListSerializer
+        """
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            queryset = queryset.prefetch_related(LOTES_ACTIVOS)
+        if self.action == 'list':
+            return queryset.only(*PRODUCTO_LIST_FIELDS)
+        return queryset
+
     @action(detail=False, methods=['get'])
     def stock_bajo(self, request):
         """
         Obtiene productos con stock bajo
         GET /api/v1/inventario/productos/stock-bajo/
         """
-        productos = []
-        for producto in self.queryset.filter(activo=True):
-            if producto.tiene_stock_bajo:
-                productos.append(producto)
+        productos = self.queryset.filter(activo=True).annotate(
+            stock_total=STOCK_TOTAL
+        ).filter(stock_total__lt=F('stock_minimo')).order_by('nombre')
 
-        serializer = ProductoListSerializer(productos, many=True)
-        return Response(serializer.data)
+        return Response(producto_list_rows(productos))
 
     @action(detail=False, methods=['get'])
     def reporte_stock(self, request):
@@ -83,37 +134,49 @@ class ProductoViewSet(viewsets.ModelViewSet):
         Genera un reporte general de stock
         GET /api/v1/inventario/productos/reporte-stock/
         """
-        productos = self.queryset.filter(activo=True)
-        reporte = []
-
-        for producto in productos:
-            stock_total = producto.stock_total
-            cantidad_lotes = producto.lotes.filter(activo=True).count()
-
-            # Determinar estado
-            if stock_total == 0:
-                estado = 'SIN_STOCK'
-            elif stock_total < producto.stock_minimo:
-                estado = 'STOCK_BAJO'
-            elif stock_total > producto.stock_maximo:
-                estado = 'SOBRESTOCK'
-            else:
-                estado = 'NORMAL'
-
-            reporte.append({
-                'producto_id': producto.id,
-                'producto_codigo': producto.codigo,
-                'producto_nombre': producto.nombre,
-                'categoria': producto.get_categoria_display(),
-                'stock_total': stock_total,
-                'stock_minimo': producto.stock_minimo,
-                'stock_maximo': producto.stock_maximo,
-                'estado': estado,
-                'cantidad_lotes': cantidad_lotes
-            })
-
-        serializer = StockReportSerializer(reporte, many=True)
-        return Response(serializer.data)
+        productos = self.queryset.filter(activo=True).annotate(
+            stock_total=STOCK_TOTAL,
+            cantidad_lotes=Count('lotes', filter=Q(lotes__activo=True)),
+            estado=Case(
+                When(stock_total=0, then=Value('SIN_STOCK')),
+                When(stock_total__lt=F('stock_minimo'), then=Value('STOCK_BAJO')),
+                When(stock_total__gt=F('stock_maximo'), then=Value('SOBRESTOCK')),
+                default=Value('NORMAL'),
+                output_field=CharField()
+            )
+        ).values(
+            'id',
+            'codigo',
+            'nombre',
+            'categoria',
+            'stock_total',
+            'stock_minimo',
+            'stock_maximo',
+            'estado',
+            'cantidad_lotes'
+        ).order_by('nombre')
+
+        # Se recorre con un cursor del servidor y se envía por bloques,
+        # sin construir el reporte completo en memoria
+        reporte = (
+            {
+                'producto_id': producto['id'],
+                'producto_codigo': producto['codigo'],
+                'producto_nombre': producto['nombre'],
+                'categoria': CATEGORIA_LABELS.get(producto['categoria'], producto['categoria']),
+                'stock_total': producto['stock_total'],
+                'stock_minimo': producto['stock_minimo'],
+                'stock_maximo': producto['stock_maximo'],
+                'estado': producto['estado'],
+                'cantidad_lotes': producto['cantidad_lotes']
+            }
+            for producto in productos.iterator(chunk_size=500)
+        )
+
+        return StreamingHttpResponse(
+            iter_json_array(reporte),
+            content_type='application/json'
+        )
 
     @action(detail=True, methods=['get'])
     def historial_movimientos(self, request, pk=None):
@@ -122,18 +185,17 @@ class ProductoViewSet(viewsets.ModelViewSet):
         GET /api/v1/inventario/productos/{id}/historial_movimientos/
         """
         producto = self.get_object()
-        lotes = producto.lotes.all()
 
         movimientos = MovimientoInventario.objects.filter(
-            lote__in=lotes
-        ).select_related('lote', 'realizado_por').order_by('-fecha_movimiento')
-
-        # Paginación opcional
-        limit = request.query_params.get('limit', 50)
-        movimientos = movimientos[:int(limit)]
+            lote__producto=producto
+        ).select_related('lote__producto', 'realizado_por')
 
-        serializer = MovimientoInventarioSerializer(movimientos, many=True)
-        return Response(serializer.data)
+        # Paginación por cursor (?limit= define el tamaño de página)
+        # Sin view: el ordenamiento de productos no aplica a movimientos
+        paginator = MovimientoCursorPagination()
+        page = paginator.paginate_queryset(movimientos, request)
+        serializer = MovimientoInventarioSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
 
 class LoteViewSet(viewsets.ModelViewSet):
@@ -162,7 +224,7 @@ class LoteViewSet(viewsets.ModelViewSet):
     search_fields = ['numero_lote', 'producto__nombre', 'proveedor']
 
     # Campos para ordenamiento
-    ordering_fields = ['fecha_vencimiento', 'fecha_ingreso', 'stock_actual']
+    ordering_fields = ['fecha_vencimiento', 'fecha_ingreso', 'stock_actual', 'dias_para_vencer']
     ordering = ['fecha_vencimiento']
 
     def get_serializer_class(self):
@@ -171,6 +233,45 @@ class LoteViewSet(viewsets.ModelViewSet):
             return LoteListSerializer
         return LoteSerializer
 
+    def get_queryset(self):
+        """
+        Anota los campos de vencimiento calculados en la base de datos
+        Evita la aritmética de fechas por fila en Python y permite ordenar por ellos
+        """
+        today = timezone.now().date()
+        fecha_limite = today + timedelta(days=30)
+
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = queryset.only(*LOTE_LIST_FIELDS)
+
+        return queryset.annotate(
+            dias_para_vencer=ExtractDay(
+                ExpressionWrapper(
+                    F('fecha_vencimiento') - Value(today),
+                    output_field=DurationField()
+                )
+            ),
+            proximo_a_vencer=ExpressionWrapper(
+                Q(fecha_vencimiento__gte=today, fecha_vencimiento__lte=fecha_limite),
+                output_field=BooleanField()
+            ),
+            esta_vencido=ExpressionWrapper(
+                Q(fecha_vencimiento__lt=today),
+                output_field=BooleanField()
+            )
+        )
+
+    def perform_update(self, serializer):
+        """
+        Descarta los valores de vencimiento anotados al cargar el lote
+        Se calcularon con la fecha_vencimiento anterior; tras guardar, las
+        propiedades del modelo los recalculan con la fecha nueva
+        """
+        lote = serializer.save()
+        for campo in ('_dias_para_vencer', '_proximo_a_vencer', '_esta_vencido'):
+            lote.__dict__.pop(campo, None)
+
     @action(detail=False, methods=['get'])
     def vencidos(self, request):
         """
@@ -184,8 +285,7 @@ class LoteViewSet(viewsets.ModelViewSet):
             activo=True
         )
 
-        serializer = LoteListSerializer(lotes, many=True)
-        return Response(serializer.data)
+        return Response(lote_list_rows(lotes))
 
     @action(detail=False, methods=['get'])
     def proximos_vencer(self, request):
@@ -204,8 +304,7 @@ class LoteViewSet(viewsets.ModelViewSet):
             activo=True
         )
 
-        serializer = LoteListSerializer(lotes, many=True)
-        return Response(serializer.data)
+        return Response(lote_list_rows(lotes))
 
 
 class MovimientoInventarioViewSet(viewsets.ModelViewSet):
@@ -243,6 +342,19 @@ class MovimientoInventarioViewSet(viewsets.ModelViewSet):
     ordering_fields = ['fecha_movimiento']
     ordering = ['-fecha_movimiento']
 
+    def get_queryset(self):
+        """
+        En el listado solo se leen las columnas que muestra el serializer
+        El episodio clínico solo se expone como id, no hace falta el join
+        """
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            return queryset.select_related(None).select_related(
+                'lote__producto',
+                'realizado_por'
+            ).only(*MOVIMIENTO_LIST_FIELDS)
+        return queryset
+
     def perform_create(self, serializer):
         """Guarda el usuario que realizó el movimiento"""
         serializer.save(realizado_por=self.request.user)
@@ -253,14 +365,22 @@ class MovimientoInventarioViewSet(viewsets.ModelViewSet):
         Obtiene movimientos de un producto específico
         GET /api/v1/inventario/movimientos/por-producto/{producto_id}/
         """
-        movimientos = self.queryset.filter(lote__producto_id=producto_id)
+        # Validar el id antes de consultar: un valor inválido responde 400 sin tocar la base
+        try:
+            producto_id = int(producto_id)
+        except ValueError:
+            return Response(
+                {'error': 'producto_id inválido'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        # Paginación opcional
-        limit = request.query_params.get('limit', 100)
-        movimientos = movimientos[:int(limit)]
+        movimientos = self.queryset.filter(lote__producto_id=producto_id)
 
-        serializer = self.get_serializer(movimientos, many=True)
-        return Response(serializer.data)
+        # Paginación por cursor (?limit= define el tamaño de página)
+        paginator = MovimientoCursorPagination()
+        page = paginator.paginate_queryset(movimientos, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     @action(detail=False, methods=['post'])
     def registrar_entrada(self, request):
@@ -274,12 +394,11 @@ class MovimientoInventarioViewSet(viewsets.ModelViewSet):
             "documento_referencia": "FAC-001"
         }
         """
-        data = request.data.copy()
-        data['tipo_movimiento'] = MovimientoInventario.TipoMovimiento.ENTRADA
+        tipo_movimiento = MovimientoInventario.TipoMovimiento.ENTRADA
 
-        serializer = self.get_serializer(data=data)
+        serializer = self.get_serializer(data=request.data, tipo_movimiento=tipo_movimiento)
         serializer.is_valid(raise_exception=True)
-        serializer.save(realizado_por=request.user)
+        serializer.save(realizado_por=request.user, tipo_movimiento=tipo_movimiento)
 
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -295,7 +414,6 @@ class MovimientoInventarioViewSet(viewsets.ModelViewSet):
             "episodio_clinico": 5
         }
         """
-        data = request.data.copy()
         tipo_salida = request.data.get('tipo_salida', 'SALIDA_USO')
 
         # Validar tipo de salida
@@ -305,11 +423,9 @@ class MovimientoInventarioViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        data['tipo_movimiento'] = tipo_salida
-
-        serializer = self.get_serializer(data=data)
+        serializer = self.get_serializer(data=request.data, tipo_movimiento=tipo_salida)
         serializer.is_valid(raise_exception=True)
-        serializer.save(realizado_por=request.user)
+        serializer.save(realizado_por=request.user, tipo_movimiento=tipo_salida)
 
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -3,10 +3,75 @@ Configuración del Admin para la aplicación Pacientes
 """
 
 from django.contrib import admin
+from django.db.models import Count, Value, CharField
+from django.db.models.functions import Coalesce, Concat, NullIf, Trim
 from django.utils.html import format_html
+from django.utils.safestring import mark_safe
 from .models import Especie, Raza, Mascota
 
 
+# Etiquetas de sexo precalculadas (evita get_sexo_display() por fila)
+SEXO_LABELS = dict(Mascota.Sexo.choices)
+
+BADGE_TEMPLATE = (
+    '<span style="background-color: {}; color: white; padding: 3px 10px; '
+    'border-radius: 3px; font-weight: bold;">{}</span>'
+)
+
+SEXO_COLORS = {
+    'M': '#007bff',  # Azul para macho
+    'H': '#e83e8c',  # Rosa para hembra
+    'D': '#6c757d',  # Gris para desconocido
+}
+
+# Badges renderizados una sola vez al importar el módulo
+SEXO_BADGES = {
+    sexo: format_html(BADGE_TEMPLATE, SEXO_COLORS.get(sexo, '#6c757d'), label)
+    for sexo, label in SEXO_LABELS.items()
+}
+
+ESTADO_BADGE_FALLECIDO = mark_safe(
+    '<span style="background-color: #343a40; color: white; padding: 3px 10px; '
+    'border-radius: 3px;">Fallecido</span>'
+)
+ESTADO_BADGE_ACTIVO = mark_safe(
+    '<span style="background-color: #28a745; color: white; padding: 3px 10px; '
+    'border-radius: 3px;">Activo</span>'
+)
+ESTADO_BADGE_INACTIVO = mark_safe(
+    '<span style="background-color: #ffc107; color: black; padding: 3px 10px; '
+    'border-radius: 3px;">Inactivo</span>'
+)
+
+# Columnas que usa el listado de mascotas (list_display y __str__ de mascota/raza,
+# que el checkbox de acciones renderiza en cada fila)
+MASCOTA_CHANGELIST_FIELDS = (
+    'id',
+    'foto',
+    'nombre',
+    'sexo',
+    'fecha_nacimiento',
+    'peso_actual',
+    'activo',
+    'fallecido',
+    'fecha_registro',
+    'tutor__username',
+    'tutor__first_name',
+    'tutor__last_name',
+    'especie__nombre',
+    'raza__nombre',
+    'raza__especie__nombre',
+)
+
+
+# Equivalente en SQL de `tutor.get_full_name() or tutor.username`
+TUTOR_DISPLAY = Coalesce(
+    NullIf(Trim(Concat('tutor__first_name', Value(' '), 'tutor__last_name')), Value('')),
+    'tutor__username',
+    output_field=CharField()
+)
+
+
 @admin.register(Especie)
 class EspecieAdmin(admin.ModelAdmin):
     """
@@ -31,15 +96,24 @@ class EspecieAdmin(admin.ModelAdmin):
 
     readonly_fields = ('fecha_creacion',)
 
+    def get_queryset(self, request):
+        """Anota los conteos para evitar dos consultas por fila"""
+        return super().get_queryset(request).annotate(
+            _n_razas=Count('razas', distinct=True),
+            _n_mascotas=Count('mascotas', distinct=True)
+        )
+
     def cantidad_razas(self, obj):
         """Cuenta el número de razas asociadas"""
-        return obj.razas.count()
+        return obj._n_razas
     cantidad_razas.short_description = 'N° Razas'
+    cantidad_razas.admin_order_field = '_n_razas'
 
     def cantidad_mascotas(self, obj):
         """Cuenta el número de mascotas asociadas"""
-        return obj.mascotas.count()
+        return obj._n_mascotas
     cantidad_mascotas.short_description = 'N° Mascotas'
+    cantidad_mascotas.admin_order_field = '_n_mascotas'
 
 
 class RazaInline(admin.TabularInline):
@@ -75,10 +149,17 @@ class RazaAdmin(admin.ModelAdmin):
 
     readonly_fields = ('fecha_creacion',)
 
+    def get_queryset(self, request):
+        """Anota el conteo de mascotas para evitar una consulta por fila"""
+        return super().get_queryset(request).annotate(
+            _n_mascotas=Count('mascotas')
+        )
+
     def cantidad_mascotas(self, obj):
         """Cuenta el número de mascotas asociadas"""
-        return obj.mascotas.count()
+        return obj._n_mascotas
     cantidad_mascotas.short_description = 'N° Mascotas'
+    cantidad_mascotas.admin_order_field = '_n_mascotas'
 
 
 @admin.register(Mascota)
@@ -175,44 +256,27 @@ class MascotaAdmin(admin.ModelAdmin):
         """Muestra el nombre del tutor con enlace"""
         return format_html(
             '<a href="/admin/usuarios/user/{}/change/">{}</a>',
-            obj.tutor.id,
-            obj.tutor.get_full_name() or obj.tutor.username
+            obj.tutor_id,
+            obj.tutor_display
         )
     tutor_link.short_description = 'Tutor'
+    tutor_link.admin_order_field = 'tutor_display'
 
     def sexo_badge(self, obj):
         """Muestra el sexo con un badge de color"""
-        colors = {
-            'M': '#007bff',  # Azul para macho
-            'H': '#e83e8c',  # Rosa para hembra
-            'D': '#6c757d',  # Gris para desconocido
-        }
-        color = colors.get(obj.sexo, '#6c757d')
-        return format_html(
-            '<span style="background-color: {}; color: white; padding: 3px 10px; '
-            'border-radius: 3px; font-weight: bold;">{}</span>',
-            color,
-            obj.get_sexo_display()
-        )
+        badge = SEXO_BADGES.get(obj.sexo)
+        if badge is None:
+            badge = format_html(BADGE_TEMPLATE, '#6c757d', obj.sexo)
+        return badge
     sexo_badge.short_description = 'Sexo'
 
     def estado_badge(self, obj):
         """Muestra el estado con un badge de color"""
         if obj.fallecido:
-            return format_html(
-                '<span style="background-color: #343a40; color: white; padding: 3px 10px; '
-                'border-radius: 3px;">Fallecido</span>'
-            )
+            return ESTADO_BADGE_FALLECIDO
         elif obj.activo:
-            return format_html(
-                '<span style="background-color: #28a745; color: white; padding: 3px 10px; '
-                'border-radius: 3px;">Activo</span>'
-            )
-        else:
-            return format_html(
-                '<span style="background-color: #ffc107; color: black; padding: 3px 10px; '
-                'border-radius: 3px;">Inactivo</span>'
-            )
+            return ESTADO_BADGE_ACTIVO
+        return ESTADO_BADGE_INACTIVO
     estado_badge.short_description = 'Estado'
 
     def edad(self, obj):
@@ -229,5 +293,17 @@ class MascotaAdmin(admin.ModelAdmin):
     edad.short_description = 'Edad'
 
     def get_queryset(self, request):
-        """Optimiza las consultas"""
-        return super().get_queryset(request).select_related('tutor', 'especie', 'raza')
+        """
+        Optimiza las consultas según la vista del admin
+        Solo el listado muestra la raza y lee únicamente las columnas de
+        list_display, con el nombre del tutor calculado en SQL; todas las
+        vistas necesitan tutor y especie para __str__
+        """
+        queryset = super().get_queryset(request)
+        url_name = getattr(request.resolver_match, 'url_name', None) or ''
+
+        if url_name.endswith('_changelist'):
+            return queryset.select_related(
+                'tutor', 'especie', 'raza__especie'
+            ).only(*MASCOTA_CHANGELIST_FIELDS).annotate(tutor_display=TUTOR_DISPLAY)
+        return queryset.select_related('tutor', 'especie')
@@ -5,3 +5,7 @@ class PacientesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pacientes'
     verbose_name = 'Gestión de Pacientes'
+
+    def ready(self):
+        # Registrar las señales de invalidación de caché
+        from . import signals  # noqa: F401
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.1 on 2026-10-15 22:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pacientes', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='mascota',
+            name='pacientes_m_especie_b8f02e_idx',
+        ),
+        migrations.AddIndex(
+            model_name='mascota',
+            index=models.Index(fields=['especie', 'raza'], name='pacientes_m_especie_83bcf1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mascota',
+            index=models.Index(fields=['-fecha_registro'], name='pacientes_m_fecha_r_8a07a2_idx'),
+        ),
+    ]
@@ -3,11 +3,39 @@ Modelos de la aplicación Pacientes
 Maneja las mascotas, especies y razas del sistema RamboPet
 """
 
+from datetime import date
 from django.db import models
 from django.conf import settings
 from django.core.validators import MinValueValidator
 
 
+def calcular_edad(fecha_nacimiento, today=None):
+    """Calcula la edad en años cumplidos a partir de la fecha de nacimiento"""
+    if not fecha_nacimiento:
+        return None
+
+    today = today or date.today()
+
+    # Restar 1 si aún no ha cumplido años este año (True cuenta como 1)
+    return today.year - fecha_nacimiento.year - (
+        (today.month, today.day) < (fecha_nacimiento.month, fecha_nacimiento.day)
+    )
+
+
+def edad_sql(today=None):
+    """
+    Versión SQL de calcular_edad para anotar querysets (PostgreSQL)
+    Uso: Mascota.objects.values('id', edad_aproximada=edad_sql())
+    Con annotate() usar otro alias: edad_aproximada es una propiedad sin setter
+    """
+    return models.Func(
+        models.Value(today or date.today(), output_field=models.DateField()),
+        models.F('fecha_nacimiento'),
+        template='EXTRACT(YEAR FROM AGE(%(expressions)s))::integer',
+        output_field=models.IntegerField()
+    )
+
+
 class Especie(models.Model):
     """
     Modelo para las especies de animales
@@ -232,8 +260,11 @@ class Mascota(models.Model):
         ordering = ['-fecha_registro']
         indexes = [
             models.Index(fields=['tutor', 'activo']),
-            models.Index(fields=['especie']),
+            # Filtros por especie y raza del listado (también cubre especie sola)
+            models.Index(fields=['especie', 'raza']),
             models.Index(fields=['microchip']),
+            # Orden por defecto de los listados
+            models.Index(fields=['-fecha_registro']),
         ]
 
     def __str__(self):
@@ -242,19 +273,17 @@ class Mascota(models.Model):
     @property
     def edad_aproximada(self):
         """Calcula la edad aproximada en años"""
-        if not self.fecha_nacimiento:
-            return None
-
-        from datetime import date
-        today = date.today()
-        edad = today.year - self.fecha_nacimiento.year
-
-        # Ajustar si aún no ha cumplido años este año
-        if today.month < self.fecha_nacimiento.month or \
-           (today.month == self.fecha_nacimiento.month and today.day < self.fecha_nacimiento.day):
-            edad -= 1
-
-        return edad
+        return calcular_edad(self.fecha_nacimiento)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Guarda la raza y especie cargadas para no revalidarlas si no cambian"""
+        instance = super().from_db(db, field_names, values)
+        instance._raza_especie_original = (
+            instance.__dict__.get('raza_id'),
+            instance.__dict__.get('especie_id')
+        )
+        return instance
 
     def save(self, *args, **kwargs):
         """Validaciones personalizadas al guardar"""
@@ -262,10 +291,20 @@ class Mascota(models.Model):
         if self.fallecido:
             self.activo = False
 
-        # Validar que la raza pertenezca a la especie
-        if self.raza and self.raza.especie != self.especie:
-            raise ValueError(
-                f"La raza {self.raza.nombre} no pertenece a la especie {self.especie.nombre}"
-            )
+        # Validar que la raza pertenezca a la especie (solo si cambiaron)
+        raza_especie = (self.raza_id, self.especie_id)
+        if self.raza_id and raza_especie != getattr(self, '_raza_especie_original', None):
+            if Mascota.raza.is_cached(self):
+                especie_raza_id = self.raza.especie_id
+            else:
+                especie_raza_id = Raza.objects.filter(
+                    pk=self.raza_id
+                ).values_list('especie_id', flat=True).first()
+
+            if especie_raza_id != self.especie_id:
+                raise ValueError(
+                    f"La raza {self.raza.nombre} no pertenece a la especie {self.especie.nombre}"
+                )
 
         super().save(*args, **kwargs)
+        self._raza_especie_original = raza_especie
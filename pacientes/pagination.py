@@ -0,0 +1,90 @@
+"""
+Clases de paginación para la aplicación Pacientes
+"""
+
+from django.core.paginator import EmptyPage, Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.pagination import PageNumberPagination
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator que evita el COUNT(*) sobre la tabla completa
+    Sin filtros usa la estimación de PostgreSQL (pg_class.reltuples); con filtros,
+    tablas pequeñas o sin estadísticas cuenta de forma exacta
+    """
+
+    # Por debajo de este tamaño el COUNT(*) es barato y se prefiere el valor exacto
+    umbral_estimacion = 10000
+
+    # Indica si count proviene de la estimación
+    estimado = False
+
+    @cached_property
+    def count(self):
+        estimado = self._estimar_total()
+        if estimado is not None and estimado >= self.umbral_estimacion:
+            self.estimado = True
+            return estimado
+        return super().count
+
+    def validate_number(self, number):
+        """
+        La estimación puede quedar por debajo del total real (estadísticas viejas
+        tras cargas masivas): antes de responder EmptyPage se confirma con el conteo exacto
+        """
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            if not self._usar_conteo_exacto():
+                raise
+            return super().validate_number(number)
+
+    def page(self, number):
+        """
+        En la última página según la estimación se cuenta de forma exacta, para no
+        recortar sus filas al total estimado y para que has_next() sea correcto
+        """
+        number = self.validate_number(number)
+        if number >= self.num_pages:
+            self._usar_conteo_exacto()
+        return super().page(number)
+
+    def _usar_conteo_exacto(self):
+        """Reemplaza la estimación por el COUNT(*) real; retorna False si ya era exacto"""
+        if not self.estimado:
+            return False
+
+        self.estimado = False
+        self.__dict__['count'] = Paginator.count.func(self)
+        self.__dict__.pop('num_pages', None)
+        return True
+
+    def _estimar_total(self):
+        """Retorna el número estimado de filas o None si no aplica"""
+        queryset = self.object_list
+        query = getattr(queryset, 'query', None)
+        if query is None or query.where or query.distinct:
+            return None
+
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+                [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+
+        # reltuples es -1 (o 0) si la tabla aún no tiene estadísticas
+        return row[0] if row and row[0] > 0 else None
+
+
+class MascotaPagination(PageNumberPagination):
+    """
+    Paginación por número de página con conteo estimado para el listado de mascotas
+    """
+    django_paginator_class = EstimatedCountPaginator
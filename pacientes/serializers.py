@@ -2,8 +2,11 @@
 Serializers para la aplicación Pacientes
 """
 
+from django.db.models import Value
+from django.db.models.functions import Concat, Trim
 from rest_framework import serializers
-from .models import Especie, Raza, Mascota
+from config.serializers import CachedFieldsMixin
+from .models import Especie, Raza, Mascota, edad_sql
 from usuarios.serializers import TutorSerializer
 
 
@@ -11,8 +14,9 @@ class EspecieSerializer(serializers.ModelSerializer):
     """
     Serializer para el modelo Especie
     """
-    cantidad_razas = serializers.SerializerMethodField()
-    cantidad_mascotas = serializers.SerializerMethodField()
+    # Conteos anotados en el queryset (ver EspecieViewSet.get_queryset)
+    cantidad_razas = serializers.IntegerField(read_only=True)
+    cantidad_mascotas = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Especie
@@ -27,11 +31,12 @@ class EspecieSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'fecha_creacion']
 
-    def get_cantidad_razas(self, obj):
-        return obj.razas.count()
-
-    def get_cantidad_mascotas(self, obj):
-        return obj.mascotas.count()
+    def create(self, validated_data):
+        """Una especie nueva no tiene razas ni mascotas: no hace falta contarlas"""
+        especie = super().create(validated_data)
+        especie.cantidad_razas = 0
+        especie.cantidad_mascotas = 0
+        return especie
 
 
 class RazaSerializer(serializers.ModelSerializer):
@@ -39,7 +44,8 @@ class RazaSerializer(serializers.ModelSerializer):
     Serializer para el modelo Raza
     """
     especie_nombre = serializers.CharField(source='especie.nombre', read_only=True)
-    cantidad_mascotas = serializers.SerializerMethodField()
+    # Conteo anotado en el queryset (ver RazaViewSet.get_queryset)
+    cantidad_mascotas = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Raza
@@ -55,11 +61,14 @@ class RazaSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'fecha_creacion']
 
-    def get_cantidad_mascotas(self, obj):
-        return obj.mascotas.count()
+    def create(self, validated_data):
+        """Una raza nueva no tiene mascotas: no hace falta contarlas"""
+        raza = super().create(validated_data)
+        raza.cantidad_mascotas = 0
+        return raza
 
 
-class MascotaSerializer(serializers.ModelSerializer):
+class MascotaSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """
     Serializer completo para el modelo Mascota
     """
@@ -125,7 +134,7 @@ class MascotaSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class MascotaListSerializer(serializers.ModelSerializer):
+class MascotaListSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """
     Serializer simplificado para listados de mascotas
     """
@@ -151,6 +160,75 @@ class MascotaListSerializer(serializers.ModelSerializer):
         ]
 
 
+# Columnas de Mascota que necesita iter_mascota_list_rows (además de mascota_list_anotaciones)
+MASCOTA_LIST_VALUES = (
+    'id',
+    'nombre',
+    'especie__nombre',
+    'raza__nombre',
+    'sexo',
+    'peso_actual',
+    'foto',
+    'activo',
+    'fallecido',
+)
+
+
+def mascota_list_anotaciones():
+    """
+    Campos calculados en SQL para iter_mascota_list_rows
+    tutor_nombre equivale a tutor.get_full_name() y edad_aproximada a calcular_edad()
+    """
+    return {
+        'tutor_nombre': Trim(Concat('tutor__first_name', Value(' '), 'tutor__last_name')),
+        'edad_aproximada': edad_sql(),
+    }
+
+
+def iter_mascota_list_rows(rows, request=None):
+    """
+    Versión de solo lectura de MascotaListSerializer basada en values()
+    Evita instanciar modelos y campos de DRF por fila
+    Recibe filas con MASCOTA_LIST_VALUES y mascota_list_anotaciones; genera una fila
+    de salida por cada una, sin acumularlas (apto para iterator())
+    """
+    storage = Mascota._meta.get_field('foto').storage
+
+    for mascota in rows:
+        row = {
+            'id': mascota['id'],
+            'nombre': mascota['nombre'],
+            'tutor_nombre': mascota['tutor_nombre'],
+            'especie_nombre': mascota['especie__nombre'],
+        }
+        # Igual que el serializer: sin raza no se incluye raza_nombre
+        if mascota['raza__nombre'] is not None:
+            row['raza_nombre'] = mascota['raza__nombre']
+
+        foto = None
+        if mascota['foto']:
+            foto = storage.url(mascota['foto'])
+            if request is not None:
+                foto = request.build_absolute_uri(foto)
+
+        row.update({
+            'sexo': mascota['sexo'],
+            'edad_aproximada': mascota['edad_aproximada'],
+            'peso_actual': (
+                str(mascota['peso_actual']) if mascota['peso_actual'] is not None else None
+            ),
+            'foto': foto,
+            'activo': mascota['activo'],
+            'fallecido': mascota['fallecido']
+        })
+        yield row
+
+
+def mascota_list_rows(rows, request=None):
+    """Igual que iter_mascota_list_rows pero retorna una lista (filas ya paginadas)"""
+    return list(iter_mascota_list_rows(rows, request))
+
+
 class MascotaDetailSerializer(serializers.ModelSerializer):
     """
     Serializer detallado para ver una mascota específica
@@ -188,3 +266,16 @@ class MascotaDetailSerializer(serializers.ModelSerializer):
             'fecha_registro',
             'fecha_actualizacion'
         ]
+
+    def to_representation(self, instance):
+        """
+        Pasa a especie y raza los conteos anotados en la consulta del detalle
+        (ver MascotaViewSet.get_queryset) para que los serializers anidados no cuenten
+        """
+        if hasattr(instance, 'especie_cantidad_razas'):
+            instance.especie.cantidad_razas = instance.especie_cantidad_razas
+            instance.especie.cantidad_mascotas = instance.especie_cantidad_mascotas
+            if instance.raza is not None:
+                instance.raza.cantidad_mascotas = instance.raza_cantidad_mascotas
+
+        return super().to_representation(instance)
@@ -0,0 +1,35 @@
+"""
+Señales de la aplicación Pacientes
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from config.cache import bump_cache_version
+from .models import Especie, Raza, Mascota
+
+
+# Espacio de claves de los listados cacheados de especies y razas; ambos exponen
+# conteos de razas/mascotas, así que cualquier alta o baja los invalida
+CATALOGO_CACHE_NAMESPACE = 'pacientes:catalogo'
+
+
+@receiver(post_save, sender=Especie)
+@receiver(post_delete, sender=Especie)
+@receiver(post_save, sender=Raza)
+@receiver(post_delete, sender=Raza)
+def invalidar_catalogo(sender, **kwargs):
+    """Invalida los listados cacheados de especies y razas"""
+    bump_cache_version(CATALOGO_CACHE_NAMESPACE)
+
+
+@receiver(post_save, sender=Mascota)
+@receiver(post_delete, sender=Mascota)
+def invalidar_catalogo_por_mascota(sender, created=False, update_fields=None, **kwargs):
+    """
+    Invalida los listados si puede haber cambiado un conteo de mascotas
+    Las ediciones parciales que no tocan especie ni raza no afectan los conteos
+    """
+    if update_fields is not None and not {'especie', 'raza'} & set(update_fields):
+        return
+    bump_cache_version(CATALOGO_CACHE_NAMESPACE)
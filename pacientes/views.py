@@ -6,19 +6,57 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.db.models import Count, F, Func, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
+from config.mixins import CachedListMixin, OptionalFiltersMixin
+from config.renderers import iter_json_array
 from .models import Especie, Raza, Mascota
+from .pagination import MascotaPagination
+from .signals import CATALOGO_CACHE_NAMESPACE
 from .serializers import (
     EspecieSerializer,
     RazaSerializer,
     MascotaSerializer,
     MascotaListSerializer,
-    MascotaDetailSerializer
+    MascotaDetailSerializer,
+    MASCOTA_LIST_VALUES,
+    mascota_list_anotaciones,
+    mascota_list_rows,
+    iter_mascota_list_rows
 )
 
 
-class EspecieViewSet(viewsets.ModelViewSet):
+# Conteos que exponen EspecieSerializer y RazaSerializer, anotados en cada consulta
+CONTEOS_ESPECIE = {
+    'cantidad_razas': Count('razas', distinct=True),
+    'cantidad_mascotas': Count('mascotas', distinct=True),
+}
+
+CONTEOS_RAZA = {
+    'cantidad_mascotas': Count('mascotas'),
+}
+
+
+def _conteo(queryset):
+    """
+    COUNT correlacionado como subconsulta escalar (0 si no hay filas)
+    A diferencia de varios Count() sobre joins, no multiplica las filas entre relaciones
+    """
+    return Coalesce(
+        Subquery(
+            queryset.order_by().annotate(
+                total=Func(F('pk'), function='COUNT')
+            ).values('total')[:1]
+        ),
+        0
+    )
+
+
+class EspecieViewSet(CachedListMixin, OptionalFiltersMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestión de especies
 
@@ -40,6 +78,13 @@ class EspecieViewSet(viewsets.ModelViewSet):
     ordering_fields = ['nombre', 'fecha_creacion']
     ordering = ['nombre']
 
+    # Catálogo casi estático: el listado se cachea (ver pacientes.signals)
+    cache_namespace = CATALOGO_CACHE_NAMESPACE
+
+    def get_queryset(self):
+        """Anota los conteos de razas y mascotas en la misma consulta del listado"""
+        return super().get_queryset().annotate(**CONTEOS_ESPECIE)
+
     @action(detail=True, methods=['get'])
     def razas(self, request, pk=None):
         """
@@ -47,12 +92,19 @@ class EspecieViewSet(viewsets.ModelViewSet):
         GET /api/v1/pacientes/especies/{id}/razas/
         """
         especie = self.get_object()
-        razas = especie.razas.filter(activo=True)
+        razas = especie.razas.filter(activo=True).select_related('especie').annotate(
+            **CONTEOS_RAZA
+        ).order_by('nombre')
+
+        page = self.paginate_queryset(razas)
+        if page is not None:
+            return self.get_paginated_response(RazaSerializer(page, many=True).data)
+
         serializer = RazaSerializer(razas, many=True)
         return Response(serializer.data)
 
 
-class RazaViewSet(viewsets.ModelViewSet):
+class RazaViewSet(CachedListMixin, OptionalFiltersMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestión de razas
 
@@ -74,8 +126,15 @@ class RazaViewSet(viewsets.ModelViewSet):
     ordering_fields = ['nombre', 'especie__nombre', 'fecha_creacion']
     ordering = ['especie__nombre', 'nombre']
 
+    # Catálogo casi estático: el listado se cachea (ver pacientes.signals)
+    cache_namespace = CATALOGO_CACHE_NAMESPACE
+
+    def get_queryset(self):
+        """Anota el conteo de mascotas en la misma consulta del listado"""
+        return super().get_queryset().annotate(**CONTEOS_RAZA)
 
-class MascotaViewSet(viewsets.ModelViewSet):
+
+class MascotaViewSet(OptionalFiltersMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestión de mascotas
 
@@ -86,11 +145,13 @@ class MascotaViewSet(viewsets.ModelViewSet):
     - PUT/PATCH /api/v1/pacientes/mascotas/{id}/ - Actualiza una mascota
     - DELETE /api/v1/pacientes/mascotas/{id}/ - Elimina una mascota
     - GET /api/v1/pacientes/mascotas/mis-mascotas/ - Obtiene las mascotas del usuario actual
+    - GET /api/v1/pacientes/mascotas/exportar/ - Exporta las mascotas sin paginar
     """
 
     queryset = Mascota.objects.select_related('tutor', 'especie', 'raza')
     serializer_class = MascotaSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = MascotaPagination
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
 
     # Campos para filtrado
@@ -130,24 +191,105 @@ class MascotaViewSet(viewsets.ModelViewSet):
         Filtra el queryset según el rol del usuario
         Los tutores solo ven sus propias mascotas
         """
-        queryset = super().get_queryset()
+        if self.action == 'retrieve':
+            # El detalle anida especie y raza con sus conteos: se calculan como
+            # subconsultas en la misma consulta (ver MascotaDetailSerializer.to_representation)
+            queryset = Mascota.objects.select_related(
+                'tutor', 'especie', 'raza__especie'
+            ).annotate(
+                especie_cantidad_razas=_conteo(Raza.objects.filter(especie=OuterRef('especie'))),
+                especie_cantidad_mascotas=_conteo(Mascota.objects.filter(especie=OuterRef('especie'))),
+                raza_cantidad_mascotas=_conteo(Mascota.objects.filter(raza=OuterRef('raza')))
+            )
+        elif self.action in ('marcar_fallecido', 'actualizar_peso'):
+            # Se actualizan con un UPDATE directo: sin joins ni columnas que cargar
+            queryset = Mascota.objects.all()
+        else:
+            queryset = super().get_queryset()
+
+        user = self.request.user
 
         # Si el usuario es tutor, solo mostrar sus mascotas
-        if self.request.user.es_tutor:
-            return queryset.filter(tutor=self.request.user)
+        if user.es_tutor:
+            return queryset.filter(tutor=user)
 
         # Personal puede ver todas las mascotas
         return queryset
 
+    def create(self, request, *args, **kwargs):
+        """
+        Crea una mascota validando con MascotaSerializer
+        Responde con la representación resumida de MascotaListSerializer
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+
+        data = self._representacion_resumida(serializer.instance)
+        headers = self.get_success_headers(data)
+        return Response(data, status=status.HTTP_201_CREATED, headers=headers)
+
+    def update(self, request, *args, **kwargs):
+        """
+        Actualiza una mascota validando con MascotaSerializer
+        Responde con la representación resumida de MascotaListSerializer
+        """
+        partial = kwargs.pop('partial', False)
+        instance = self.get_object()
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+
+        return Response(self._representacion_resumida(serializer.instance))
+
+    def _representacion_resumida(self, instance):
+        """Serializa la mascota sin los campos de texto largos del registro completo"""
+        return MascotaListSerializer(instance, context=self.get_serializer_context()).data
+
+    def list(self, request, *args, **kwargs):
+        """
+        Lista mascotas leyendo filas con values() en lugar de instancias
+        La salida es la misma que la de MascotaListSerializer
+        """
+        return self._list_rows_response(self.filter_queryset(self.get_queryset()))
+
+    def _list_rows_response(self, queryset):
+        """Pagina el queryset como filas values() con el formato de MascotaListSerializer"""
+        queryset = queryset.values(*MASCOTA_LIST_VALUES, **mascota_list_anotaciones())
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(mascota_list_rows(page, self.request))
+
+        return Response(mascota_list_rows(queryset, self.request))
+
     @action(detail=False, methods=['get'])
     def mis_mascotas(self, request):
         """
         Endpoint para obtener las mascotas del usuario actual
         GET /api/v1/pacientes/mascotas/mis-mascotas/
         """
-        mascotas = self.queryset.filter(tutor=request.user, activo=True)
-        serializer = MascotaListSerializer(mascotas, many=True)
-        return Response(serializer.data)
+        # Mismo flujo que el listado: get_queryset, filtros, búsqueda y paginación
+        mascotas = self.filter_queryset(self.get_queryset()).filter(
+            tutor=request.user,
+            activo=True
+        )
+        return self._list_rows_response(mascotas)
+
+    @action(detail=False, methods=['get'])
+    def exportar(self, request):
+        """
+        Exporta todas las mascotas visibles (con filtros y búsqueda), sin paginar
+        GET /api/v1/pacientes/mascotas/exportar/
+        """
+        mascotas = self.filter_queryset(self.get_queryset()).values(
+            *MASCOTA_LIST_VALUES, **mascota_list_anotaciones()
+        )
+
+        # Cursor del servidor por bloques y respuesta en streaming: ni el ORM
+        # ni la respuesta mantienen todas las filas en memoria
+        filas = iter_mascota_list_rows(mascotas.iterator(chunk_size=2000), request)
+        return StreamingHttpResponse(iter_json_array(filas), content_type='application/json')
 
     @action(detail=True, methods=['post'])
     def marcar_fallecido(self, request, pk=None):
@@ -156,7 +298,6 @@ class MascotaViewSet(viewsets.ModelViewSet):
         POST /api/v1/pacientes/mascotas/{id}/marcar_fallecido/
         Body: { "fecha_fallecimiento": "2024-01-15" }
         """
-        mascota = self.get_object()
         fecha_fallecimiento = request.data.get('fecha_fallecimiento')
 
         if not fecha_fallecimiento:
@@ -165,10 +306,12 @@ class MascotaViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        mascota.fallecido = True
-        mascota.fecha_fallecimiento = fecha_fallecimiento
-        mascota.activo = False
-        mascota.save()
+        # Mismo efecto que save(): fallecido implica inactivo
+        self._actualizar_mascota(
+            fallecido=True,
+            fecha_fallecimiento=fecha_fallecimiento,
+            activo=False
+        )
 
         return Response(
             {'status': 'Mascota marcada como fallecida'},
@@ -182,7 +325,6 @@ class MascotaViewSet(viewsets.ModelViewSet):
         POST /api/v1/pacientes/mascotas/{id}/actualizar_peso/
         Body: { "peso": 15.5 }
         """
-        mascota = self.get_object()
         peso = request.data.get('peso')
 
         if not peso:
@@ -192,17 +334,35 @@ class MascotaViewSet(viewsets.ModelViewSet):
             )
 
         try:
-            mascota.peso_actual = float(peso)
-            mascota.save()
-            return Response(
-                {
-                    'status': 'Peso actualizado exitosamente',
-                    'peso_actual': mascota.peso_actual
-                },
-                status=status.HTTP_200_OK
-            )
-        except ValueError:
+            peso_actual = float(peso)
+        except (TypeError, ValueError):
             return Response(
                 {'error': 'El peso debe ser un número válido'},
                 status=status.HTTP_400_BAD_REQUEST
             )
+
+        self._actualizar_mascota(peso_actual=peso_actual)
+
+        return Response(
+            {
+                'status': 'Peso actualizado exitosamente',
+                'peso_actual': peso_actual
+            },
+            status=status.HTTP_200_OK
+        )
+
+    def _actualizar_mascota(self, **campos):
+        """
+        Actualiza la mascota de la URL con un único UPDATE, sin cargarla antes
+        Parte de get_queryset() para respetar el filtro por tutor; 404 si no hay fila
+        """
+        # update() no pasa por save(): auto_now se asigna a mano
+        campos['fecha_actualizacion'] = timezone.now()
+        try:
+            actualizadas = self.get_queryset().filter(pk=self.kwargs['pk']).update(**campos)
+        except (TypeError, ValueError):
+            # pk no numérico: mismo criterio que get_object_or_404
+            actualizadas = 0
+
+        if not actualizadas:
+            raise Http404('No se encontró la mascota')
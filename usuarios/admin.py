@@ -8,6 +8,40 @@ from django.utils.html import format_html
 from .models import User
 
 
+BADGE_TEMPLATE = (
+    '<span style="background-color: {}; color: white; padding: 3px 10px; '
+    'border-radius: 3px; font-weight: bold;">{}</span>'
+)
+
+ROL_COLORS = {
+    'TUTOR': '#17a2b8',      # Info blue
+    'MEDICO': '#28a745',     # Success green
+    'RECEPCION': '#ffc107',  # Warning yellow
+    'ADMIN': '#dc3545',      # Danger red
+}
+
+# Badges renderizados una sola vez al importar el módulo
+ROL_BADGES = {
+    rol: format_html(BADGE_TEMPLATE, ROL_COLORS.get(rol, '#6c757d'), label)
+    for rol, label in User.Rol.choices
+}
+
+# Columnas que usa el listado (list_display y __str__); fecha_actualizacion se
+# incluye para que auto_now se guarde al editar is_active desde la lista
+USER_CHANGELIST_FIELDS = (
+    'id',
+    'username',
+    'email',
+    'first_name',
+    'last_name',
+    'rol',
+    'telefono',
+    'is_active',
+    'is_staff',
+    'fecha_registro',
+    'fecha_actualizacion',
+)
+
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
     """
@@ -114,21 +148,21 @@ class UserAdmin(BaseUserAdmin):
 
     def rol_badge(self, obj):
         """Muestra el rol con un badge de color"""
-        colors = {
-            'TUTOR': '#17a2b8',      # Info blue
-            'MEDICO': '#28a745',     # Success green
-            'RECEPCION': '#ffc107',  # Warning yellow
-            'ADMIN': '#dc3545',      # Danger red
-        }
-        color = colors.get(obj.rol, '#6c757d')
-        return format_html(
-            '<span style="background-color: {}; color: white; padding: 3px 10px; '
-            'border-radius: 3px; font-weight: bold;">{}</span>',
-            color,
-            obj.get_rol_display()
-        )
+        badge = ROL_BADGES.get(obj.rol)
+        if badge is None:
+            badge = format_html(BADGE_TEMPLATE, '#6c757d', obj.get_rol_display())
+        return badge
     rol_badge.short_description = 'Rol'
 
     def get_queryset(self, request):
-        """Optimiza las consultas"""
-        return super().get_queryset(request).select_related()
+        """
+        Optimiza las consultas según la vista del admin
+        El listado solo lee las columnas de list_display; el formulario de edición
+        necesita el registro completo
+        """
+        queryset = super().get_queryset(request)
+        url_name = getattr(request.resolver_match, 'url_name', None) or ''
+
+        if url_name.endswith('_changelist'):
+            return queryset.only(*USER_CHANGELIST_FIELDS)
+        return queryset
@@ -5,3 +5,7 @@ class UsuariosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'usuarios'
     verbose_name = 'Gestión de Usuarios'
+
+    def ready(self):
+        # Registrar las señales de invalidación de caché
+        from . import signals  # noqa: F401
@@ -0,0 +1,65 @@
+"""
+Filtros para la aplicación Usuarios
+"""
+
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+from .models import User
+
+
+# Valores booleanos aceptados, los mismos que BooleanWidget (django-filter),
+# comparados en minúsculas; cualquier otro valor se ignora en lugar de responder 400
+VALORES_BOOLEANOS = {
+    'true': True,
+    '1': True,
+    'false': False,
+    '0': False,
+}
+
+CAMPOS_BOOLEANOS = ('is_active', 'activo')
+
+
+class UserFiltrosSerializer(serializers.Serializer):
+    """
+    Valida y convierte los parámetros de filtrado del listado de usuarios
+    """
+    rol = serializers.ChoiceField(
+        choices=User.Rol.choices,
+        required=False,
+        # Mismo mensaje que el ChoiceFilter de django-filter
+        error_messages={
+            'invalid_choice': 'Seleccione una opción válida. {input} no es una de las opciones disponibles.'
+        }
+    )
+    is_active = serializers.BooleanField(required=False)
+    activo = serializers.BooleanField(required=False)
+
+
+class UserFilterBackend(BaseFilterBackend):
+    """
+    Filtros exactos por rol, is_active y activo sin django-filter
+    Para tres campos escalares basta validar los parámetros con un serializer;
+    no se construye ningún FilterSet ni su formulario en cada petición
+    Los nombres se leen de view.filterset_fields (también los usa OptionalFiltersMixin)
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        # Igual que django-filter: un parámetro vacío no filtra
+        params = {
+            campo: request.query_params[campo]
+            for campo in view.filterset_fields
+            if request.query_params.get(campo, '') != ''
+        }
+        for campo in CAMPOS_BOOLEANOS:
+            if campo in params:
+                valor = VALORES_BOOLEANOS.get(params[campo].lower())
+                if valor is None:
+                    del params[campo]
+                else:
+                    params[campo] = valor
+        if not params:
+            return queryset
+
+        serializer = UserFiltrosSerializer(data=params)
+        serializer.is_valid(raise_exception=True)
+        return queryset.filter(**serializer.validated_data)
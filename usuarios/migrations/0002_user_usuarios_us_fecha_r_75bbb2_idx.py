@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-15 22:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('usuarios', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-fecha_registro'], name='usuarios_us_fecha_r_75bbb2_idx'),
+        ),
+    ]
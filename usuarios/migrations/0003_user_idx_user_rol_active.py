@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-15 22:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('usuarios', '0002_user_usuarios_us_fecha_r_75bbb2_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['rol'], name='idx_user_rol_active'),
+        ),
+    ]
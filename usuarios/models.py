@@ -4,10 +4,31 @@ Maneja la autenticación y roles de usuarios del sistema RamboPet
 """
 
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Upper
 from django.core.validators import RegexValidator
 
 
+# Columnas de search_fields de UserViewSet con su sufijo de índice trigram
+CAMPOS_BUSQUEDA_TRGM = {
+    'username': 'username',
+    'first_name': 'first_name',
+    'last_name': 'last_name',
+    'email': 'email',
+    'telefono': 'telefono',
+    'cedula_profesional': 'cedula',
+}
+
+
+# Validador compartido del teléfono: se crea al importar el módulo y compila
+# la expresión una sola vez, en su primer uso
+telefono_validator = RegexValidator(
+    regex=r'^\+?1?\d{9,15}$',
+    message="El número de teléfono debe estar en formato: '+999999999'. Hasta 15 dígitos permitidos."
+)
+
+
 class User(AbstractUser):
     """
     Modelo de usuario personalizado que extiende AbstractUser
@@ -29,12 +50,8 @@ class User(AbstractUser):
     )
 
     # Información de contacto adicional
-    telefono_regex = RegexValidator(
-        regex=r'^\+?1?\d{9,15}$',
-        message="El número de teléfono debe estar en formato: '+999999999'. Hasta 15 dígitos permitidos."
-    )
     telefono = models.CharField(
-        validators=[telefono_regex],
+        validators=[telefono_validator],
         max_length=17,
         blank=True,
         verbose_name='Teléfono'
@@ -96,7 +113,24 @@ class User(AbstractUser):
         ordering = ['-fecha_registro']
         indexes = [
             models.Index(fields=['rol', 'activo']),
+            # Listados de médicos/tutores y destinatarios de alertas (rol=? AND activo)
+            models.Index(
+                fields=['rol'],
+                name='idx_user_rol_active',
+                condition=models.Q(activo=True)
+            ),
             models.Index(fields=['email']),
+            # Orden por defecto y cursor de paginación del listado
+            models.Index(fields=['-fecha_registro']),
+            # Búsqueda (icontains → UPPER(col) LIKE '%...%'): índices trigram sobre
+            # la misma expresión para que PostgreSQL no recorra la tabla completa
+            *(
+                GinIndex(
+                    OpClass(Upper(campo), name='gin_trgm_ops'),
+                    name=f'idx_user_{sufijo}_trgm'
+                )
+                for campo, sufijo in CAMPOS_BUSQUEDA_TRGM.items()
+            ),
         ]
 
     def __str__(self):
@@ -104,9 +138,13 @@ class User(AbstractUser):
 
     def save(self, *args, **kwargs):
         # Validación: Solo médicos pueden tener cédula profesional y especialidad
+        # Se limpian solo si tienen valor (p. ej. al dejar de ser médico); se lee
+        # __dict__ para no cargar campos diferidos
         if self.rol != self.Rol.MEDICO:
-            self.cedula_profesional = None
-            self.especialidad = ''
+            if self.__dict__.get('cedula_profesional') is not None:
+                self.cedula_profesional = None
+            if self.__dict__.get('especialidad'):
+                self.especialidad = ''
         super().save(*args, **kwargs)
 
     @property
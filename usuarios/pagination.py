@@ -0,0 +1,17 @@
+"""
+Clases de paginación para la aplicación Usuarios
+"""
+
+from rest_framework.pagination import CursorPagination
+
+
+class UserCursorPagination(CursorPagination):
+    """
+    Paginación por cursor para el listado de usuarios
+    Avanza con un WHERE sobre fecha_registro (indexado) en lugar de OFFSET y no
+    ejecuta COUNT(*)
+    """
+    ordering = '-fecha_registro'
+    page_size = 50
+    page_size_query_param = 'limit'
+    max_page_size = 200
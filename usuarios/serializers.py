@@ -3,11 +3,13 @@ Serializers para la aplicación Usuarios
 """
 
 from rest_framework import serializers
+from config.serializers import CachedFieldsMixin
 from django.contrib.auth.password_validation import validate_password
+from django.db import IntegrityError, transaction
 from .models import User
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """
     Serializer completo para el modelo User
     Incluye todos los campos relevantes
@@ -51,7 +53,9 @@ class UserSerializer(serializers.ModelSerializer):
         extra_kwargs = {
             'email': {'required': True},
             'first_name': {'required': True},
-            'last_name': {'required': True}
+            'last_name': {'required': True},
+            # La unicidad la garantiza la base de datos (ver _validar_integridad)
+            'cedula_profesional': {'validators': []}
         }
 
     def validate(self, attrs):
@@ -63,24 +67,29 @@ class UserSerializer(serializers.ModelSerializer):
                 })
         return attrs
 
-    def validate_cedula_profesional(self, value):
-        """Valida que la cédula profesional sea única si se proporciona"""
-        if value:
-            # Si estamos actualizando, excluir el usuario actual
-            queryset = User.objects.filter(cedula_profesional=value)
-            if self.instance:
-                queryset = queryset.exclude(pk=self.instance.pk)
-            if queryset.exists():
-                raise serializers.ValidationError("Esta cédula profesional ya está registrada.")
-        return value
+    def _validar_integridad(self, error):
+        """
+        Traduce la violación del índice único de la cédula profesional a un error de validación
+        Evita consultar la cédula antes de cada escritura
+        """
+        if 'cedula_profesional' in str(error):
+            raise serializers.ValidationError({
+                'cedula_profesional': ['Esta cédula profesional ya está registrada.']
+            })
 
     def create(self, validated_data):
         """Crea un nuevo usuario con contraseña encriptada"""
         validated_data.pop('password_confirm')
         password = validated_data.pop('password')
-        user = User.objects.create(**validated_data)
-        user.set_password(password)
-        user.save()
+        try:
+            with transaction.atomic():
+                # Contraseña asignada antes de guardar: un solo INSERT
+                user = User(**validated_data)
+                user.set_password(password)
+                user.save()
+        except IntegrityError as error:
+            self._validar_integridad(error)
+            raise
         return user
 
     def update(self, instance, validated_data):
@@ -91,14 +100,25 @@ class UserSerializer(serializers.ModelSerializer):
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
 
+        # Solo se escriben las columnas recibidas (más las que save() puede modificar)
+        update_fields = {*validated_data, 'fecha_actualizacion'}
+        if instance.rol != User.Rol.MEDICO:
+            update_fields.update(('cedula_profesional', 'especialidad'))
+
         if password:
             instance.set_password(password)
+            update_fields.add('password')
 
-        instance.save()
+        try:
+            with transaction.atomic():
+                instance.save(update_fields=update_fields)
+        except IntegrityError as error:
+            self._validar_integridad(error)
+            raise
         return instance
 
 
-class UserListSerializer(serializers.ModelSerializer):
+class UserListSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """
     Serializer simplificado para listados de usuarios
     """
@@ -124,6 +144,9 @@ class UserListSerializer(serializers.ModelSerializer):
 class MedicoSerializer(serializers.ModelSerializer):
     """
     Serializer específico para médicos veterinarios
+    El endpoint /medicos/ lee solo MEDICO_FIELDS con values() y arma las filas con
+    iter_usuario_rows según Meta.fields (cacheadas con cached_data); un campo
+    calculado nuevo debe agregarse en _columnas e iter_usuario_rows
     """
     nombre_completo = serializers.SerializerMethodField()
 
@@ -146,6 +169,9 @@ class MedicoSerializer(serializers.ModelSerializer):
 class TutorSerializer(serializers.ModelSerializer):
     """
     Serializer específico para tutores
+    El endpoint /tutores/ lee solo TUTOR_FIELDS con values() y arma las filas con
+    iter_usuario_rows según Meta.fields (cacheadas con cached_data); un campo
+    calculado nuevo debe agregarse en _columnas e iter_usuario_rows
     """
     nombre_completo = serializers.SerializerMethodField()
 
@@ -164,6 +190,54 @@ class TutorSerializer(serializers.ModelSerializer):
         return obj.get_full_name()
 
 
+def _columnas(serializer_class):
+    """
+    Columnas de User que lee un serializer: sus campos de modelo más las que usa
+    nombre_completo (get_full_name)
+    Se derivan de Meta.fields para que agregar un campo no exija tocar los only()/values()
+    """
+    campos = [campo for campo in serializer_class.Meta.fields if campo != 'nombre_completo']
+    return (*campos, 'first_name', 'last_name')
+
+
+MEDICO_FIELDS = _columnas(MedicoSerializer)
+TUTOR_FIELDS = _columnas(TutorSerializer)
+# fecha_registro: la paginación por cursor lee el campo de orden de la última fila
+USER_LIST_FIELDS = (*_columnas(UserListSerializer), 'fecha_registro')
+
+
+def iter_usuario_rows(serializer_class, rows, request=None):
+    """
+    Versión de solo lectura de los serializers planos de usuario basada en values()
+    Recibe filas con las columnas de _columnas(serializer_class) y genera los mismos
+    dicts que el serializer (foto_perfil absoluta solo si se pasa request)
+    """
+    storage = User._meta.get_field('foto_perfil').storage
+    campos = serializer_class.Meta.fields
+
+    for usuario in rows:
+        row = {}
+        for campo in campos:
+            if campo == 'nombre_completo':
+                # Igual que get_full_name()
+                row[campo] = f"{usuario['first_name']} {usuario['last_name']}".strip()
+            elif campo == 'foto_perfil':
+                foto = None
+                if usuario[campo]:
+                    foto = storage.url(usuario[campo])
+                    if request is not None:
+                        foto = request.build_absolute_uri(foto)
+                row[campo] = foto
+            else:
+                row[campo] = usuario[campo]
+        yield row
+
+
+def usuario_rows(serializer_class, rows, request=None):
+    """Igual que iter_usuario_rows pero retorna una lista"""
+    return list(iter_usuario_rows(serializer_class, rows, request))
+
+
 class UserProfileSerializer(serializers.ModelSerializer):
     """
     Serializer para el perfil del usuario actual
@@ -192,3 +266,15 @@ class UserProfileSerializer(serializers.ModelSerializer):
 
     def get_nombre_completo(self, obj):
         return obj.get_full_name()
+
+
+class UserBulkActivateSerializer(serializers.Serializer):
+    """
+    Datos para activar o desactivar varios usuarios en una sola operación
+    """
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=1000
+    )
+    activo = serializers.BooleanField(default=True)
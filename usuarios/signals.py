@@ -0,0 +1,30 @@
+"""
+Señales de la aplicación Usuarios
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from config.cache import bump_cache_version
+from .models import User
+from .serializers import MEDICO_FIELDS, TUTOR_FIELDS
+
+
+# Espacio de claves de los listados cacheados de médicos y tutores
+USUARIOS_CACHE_NAMESPACE = 'usuarios:listados'
+
+# Columnas que pueden cambiar esos listados: las serializadas y las del filtro
+_COLUMNAS_LISTADOS = {'rol', 'activo', *MEDICO_FIELDS, *TUTOR_FIELDS}
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidar_listados(sender, update_fields=None, **kwargs):
+    """
+    Invalida los listados de médicos y tutores
+    No se filtra por rol: un usuario que deja de ser médico también debe salir del
+    listado. Se omiten los guardados parciales ajenos (p. ej. last_login al iniciar sesión)
+    """
+    if update_fields is not None and _COLUMNAS_LISTADOS.isdisjoint(update_fields):
+        return
+    bump_cache_version(USUARIOS_CACHE_NAMESPACE)
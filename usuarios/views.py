@@ -2,23 +2,56 @@
 Views para la aplicación Usuarios
 """
 
+import hashlib
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, AllowAny
-from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
+from rest_framework.filters import OrderingFilter
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from config.cache import bump_cache_version, cached_data
+from config.filters import CachedSearchFilter
+from config.mixins import OptionalFiltersMixin
+from config.renderers import iter_json_array
+from .filters import UserFilterBackend
 from .models import User
+from .pagination import UserCursorPagination
 from .serializers import (
     UserSerializer,
     UserListSerializer,
     MedicoSerializer,
     TutorSerializer,
-    UserProfileSerializer
+    UserProfileSerializer,
+    UserBulkActivateSerializer,
+    MEDICO_FIELDS,
+    TUTOR_FIELDS,
+    USER_LIST_FIELDS,
+    iter_usuario_rows,
+    usuario_rows
 )
+from .signals import USUARIOS_CACHE_NAMESPACE
 
 
-class UserViewSet(viewsets.ModelViewSet):
+def _profile_etag(user):
+    """
+    ETag del perfil: cambia con cada guardado (fecha_actualizacion es auto_now y
+    las actualizaciones con update() también la asignan)
+    """
+    valor = f'{user.pk}:{user.fecha_actualizacion.timestamp()}'
+    return '"%s"' % hashlib.md5(valor.encode(), usedforsecurity=False).hexdigest()
+
+
+def _con_etag(response, etag):
+    """Agrega el ETag y obliga al navegador a revalidar el perfil en cada uso"""
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+class UserViewSet(OptionalFiltersMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestión completa de usuarios
 
@@ -32,14 +65,17 @@ class UserViewSet(viewsets.ModelViewSet):
     - GET /api/v1/usuarios/medicos/ - Lista solo médicos
     - GET /api/v1/usuarios/tutores/ - Lista solo tutores
     - GET /api/v1/usuarios/profile/ - Obtiene el perfil del usuario actual
+    - GET /api/v1/usuarios/exportar/ - Exporta los usuarios sin paginar
+    - POST /api/v1/usuarios/bulk_activate/ - Activa o desactiva varios usuarios
     """
 
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    pagination_class = UserCursorPagination
+    filter_backends = [UserFilterBackend, CachedSearchFilter, OrderingFilter]
 
-    # Campos para filtrado
+    # Campos para filtrado (ver UserFilterBackend)
     filterset_fields = ['rol', 'is_active', 'activo']
 
     # Campos para búsqueda
@@ -56,6 +92,26 @@ class UserViewSet(viewsets.ModelViewSet):
     ordering_fields = ['fecha_registro', 'username', 'first_name', 'last_name']
     ordering = ['-fecha_registro']
 
+    def get_queryset(self):
+        """
+        Ajusta las columnas según la acción
+        Los serializers de usuario no anidan relaciones, así que no hay joins ni
+        prefetch que agregar; el listado solo lee las columnas de UserListSerializer
+        """
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            return queryset.only(*USER_LIST_FIELDS)
+        return queryset
+
+    def filter_queryset(self, queryset):
+        """
+        Los filtros, la búsqueda y el orden solo aplican al listado y a la exportación
+        En las rutas de detalle get_object() no necesita construir el filterset
+        """
+        if self.action not in ('list', 'exportar'):
+            return queryset
+        return super().filter_queryset(queryset)
+
     def get_serializer_class(self):
         """Retorna el serializer apropiado según la acción"""
         if self.action == 'list':
@@ -72,6 +128,9 @@ class UserViewSet(viewsets.ModelViewSet):
         if self.action == 'create':
             # Permitir creación pública (registro de tutores)
             return [AllowAny()]
+        if self.action == 'bulk_activate':
+            # Operación masiva sobre cuentas ajenas: solo personal administrativo
+            return [IsAdminUser()]
         return [IsAuthenticated()]
 
     @action(detail=False, methods=['get'])
@@ -80,9 +139,12 @@ class UserViewSet(viewsets.ModelViewSet):
         Endpoint personalizado para listar solo médicos veterinarios
         GET /api/v1/usuarios/medicos/
         """
-        medicos = self.queryset.filter(rol=User.Rol.MEDICO, activo=True)
-        serializer = MedicoSerializer(medicos, many=True)
-        return Response(serializer.data)
+        def listar():
+            medicos = User.objects.filter(rol=User.Rol.MEDICO, activo=True).values(*MEDICO_FIELDS)
+            return usuario_rows(MedicoSerializer, medicos)
+
+        # Mismo resultado para cualquier usuario autenticado (ver usuarios.signals)
+        return Response(cached_data(USUARIOS_CACHE_NAMESPACE, 'medicos', listar, timeout=60))
 
     @action(detail=False, methods=['get'])
     def tutores(self, request):
@@ -90,9 +152,28 @@ class UserViewSet(viewsets.ModelViewSet):
         Endpoint personalizado para listar solo tutores
         GET /api/v1/usuarios/tutores/
         """
-        tutores = self.queryset.filter(rol=User.Rol.TUTOR, activo=True)
-        serializer = TutorSerializer(tutores, many=True)
-        return Response(serializer.data)
+        def listar():
+            tutores = User.objects.filter(rol=User.Rol.TUTOR, activo=True).values(*TUTOR_FIELDS)
+            return usuario_rows(TutorSerializer, tutores)
+
+        # Mismo resultado para cualquier usuario autenticado (ver usuarios.signals)
+        return Response(cached_data(USUARIOS_CACHE_NAMESPACE, 'tutores', listar, timeout=60))
+
+    @action(detail=False, methods=['get'])
+    def exportar(self, request):
+        """
+        Exporta todos los usuarios (con filtros, búsqueda y orden), sin paginar
+        GET /api/v1/usuarios/exportar/
+        Mismo formato que el listado
+        """
+        usuarios = self.filter_queryset(self.get_queryset()).values(*USER_LIST_FIELDS)
+
+        # Cursor del servidor por bloques y respuesta en streaming: ni el ORM
+        # ni la respuesta mantienen todas las filas en memoria
+        filas = iter_usuario_rows(
+            UserListSerializer, usuarios.iterator(chunk_size=2000), request
+        )
+        return StreamingHttpResponse(iter_json_array(filas), content_type='application/json')
 
     @action(detail=False, methods=['get', 'put', 'patch'])
     def profile(self, request):
@@ -103,8 +184,14 @@ class UserViewSet(viewsets.ModelViewSet):
         PATCH /api/v1/usuarios/profile/
         """
         if request.method == 'GET':
+            # Si el cliente ya tiene la versión vigente se responde 304 sin serializar
+            etag = _profile_etag(request.user)
+            not_modified = get_conditional_response(request, etag=etag)
+            if not_modified is not None:
+                return _con_etag(not_modified, etag)
+
             serializer = self.get_serializer(request.user)
-            return Response(serializer.data)
+            return _con_etag(Response(serializer.data), etag)
 
         elif request.method in ['PUT', 'PATCH']:
             partial = request.method == 'PATCH'
@@ -114,8 +201,8 @@ class UserViewSet(viewsets.ModelViewSet):
                 partial=partial
             )
             serializer.is_valid(raise_exception=True)
-            serializer.save()
-            return Response(serializer.data)
+            user = serializer.save()
+            return _con_etag(Response(serializer.data), _profile_etag(user))
 
     @action(detail=True, methods=['post'])
     def activate(self, request, pk=None):
@@ -123,10 +210,7 @@ class UserViewSet(viewsets.ModelViewSet):
         Activa un usuario
         POST /api/v1/usuarios/{id}/activate/
         """
-        user = self.get_object()
-        user.activo = True
-        user.is_active = True
-        user.save()
+        self._actualizar_usuario(activo=True, is_active=True)
         return Response(
             {'status': 'Usuario activado exitosamente'},
             status=status.HTTP_200_OK
@@ -138,11 +222,54 @@ class UserViewSet(viewsets.ModelViewSet):
         Desactiva un usuario
         POST /api/v1/usuarios/{id}/deactivate/
         """
-        user = self.get_object()
-        user.activo = False
-        user.is_active = False
-        user.save()
+        self._actualizar_usuario(activo=False, is_active=False)
         return Response(
             {'status': 'Usuario desactivado exitosamente'},
             status=status.HTTP_200_OK
         )
+
+    @action(detail=False, methods=['post'])
+    def bulk_activate(self, request):
+        """
+        Activa o desactiva varios usuarios con un único UPDATE
+        POST /api/v1/usuarios/bulk_activate/
+        Body: { "ids": [1, 2, 3], "activo": true }
+        """
+        serializer = UserBulkActivateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        activo = serializer.validated_data['activo']
+
+        actualizados = User.objects.filter(
+            pk__in=serializer.validated_data['ids']
+        ).update(
+            activo=activo,
+            is_active=activo,
+            fecha_actualizacion=timezone.now()
+        )
+        if actualizados:
+            bump_cache_version(USUARIOS_CACHE_NAMESPACE)
+
+        return Response(
+            {
+                'status': 'Usuarios activados exitosamente' if activo
+                else 'Usuarios desactivados exitosamente',
+                'actualizados': actualizados
+            },
+            status=status.HTTP_200_OK
+        )
+
+    def _actualizar_usuario(self, **campos):
+        """
+        Actualiza el usuario de la URL con un único UPDATE de las columnas indicadas
+        update() no emite post_save: se invalida aquí la caché de listados
+        """
+        campos['fecha_actualizacion'] = timezone.now()
+        try:
+            actualizados = self.get_queryset().filter(pk=self.kwargs['pk']).update(**campos)
+        except (TypeError, ValueError):
+            # pk no numérico: mismo criterio que get_object_or_404
+            actualizados = 0
+
+        if not actualizados:
+            raise Http404('No se encontró el usuario')
+        bump_cache_version(USUARIOS_CACHE_NAMESPACE)